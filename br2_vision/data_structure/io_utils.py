@@ -1,10 +1,18 @@
 import dataclasses
 import os
 import pickle
-from collections import OrderedDict
 
 import yaml
 
+# Use libyaml-backed (C) loader/dumper when available.
+# Full (non-safe) variants are required: saved files contain !!python/tuple tags.
+try:
+    from yaml import CDumper as YamlDumper
+    from yaml import CLoader as YamlLoader
+except ImportError:  # pragma: no cover
+    from yaml import Dumper as YamlDumper
+    from yaml import Loader as YamlLoader
+
 
 class DataclassYamlSaveLoadMixin:
     @classmethod
@@ -15,13 +23,13 @@ class DataclassYamlSaveLoadMixin:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         with open(file_path, "r") as file:
-            data_dict = yaml.load(file, Loader=yaml.Loader)
+            data_dict = yaml.load(file, Loader=YamlLoader)
         return cls(**data_dict)
 
     def to_yaml(self, file_path: str):
         """
         Save current dataclass from a yaml file.
         """
-        data_dict = dataclasses.asdict(self, dict_factory=OrderedDict)
+        data_dict = dataclasses.asdict(self)
         with open(file_path, "w") as file:
-            yaml.dump(data_dict, file)
+            yaml.dump(data_dict, file, Dumper=YamlDumper)
@@ -34,3 +34,10 @@ def test_flowqueue_h5_directory():
     flow_queue = FlowQueue((1, 2), 3, 4, 5, 6, "700")
     h5_directory = "/trajectory/camera_5/z_6/label_700"
     assert flow_queue.h5_directory == h5_directory
+
+
+def test_flowqueue_hash():
+    flow_queue = FlowQueue((1, 2), 3, 4, 5, 6, "7")
+    flow_queue2 = FlowQueue((1, 2), 3, 4, 5, 6, "7", True)
+    assert hash(flow_queue) == hash(flow_queue2)
+    assert len({flow_queue, flow_queue2}) == 1
@@ -45,3 +45,11 @@ def test_flow_queue_typecheck():
         flow_queue.label = 5
     with pytest.raises(TypeError):
         flow_queue.done = 5
+
+
+def test_flow_queue_fixed_parameters_unchanged_after_rejection():
+    flow_queue = FlowQueue((1, 2), 3, 4, 5, 6, "7")
+
+    with pytest.raises(AttributeError):
+        flow_queue.camera = 10
+    assert flow_queue.camera == 5
@@ -122,6 +122,9 @@ def test_save_pixel_flow(tmp_path, mock_flow_queues):
     with h5py.File(cache_path, "r") as h5f:
         grp = h5f.require_group(queue.h5_directory)
         assert grp["xy"].attrs["unit"] == "pixel"
+        assert grp["xy"].dtype == np.int32
+        assert grp["xy"].compression == "lzf"
+        assert grp["xy"].chunks is not None
         assert grp["xy"][queue.start_frame : queue.end_frame].shape == data.shape
         np.testing.assert_allclose(grp["xy"][queue.start_frame : queue.end_frame], data)
         np.testing.assert_allclose(grp["xy"][: queue.start_frame], -1)
@@ -206,7 +209,9 @@ def test_trim_trajectory(tmp_path, mock_flow_queues):
     with cls:
         cls.trim_trajectory(queue.get_tag(), 40)
         returned_data = cls.load_pixel_flow_trajectory(queue)
+        full_data = cls.load_pixel_flow_trajectory(queue, full_trajectory=True)
     np.testing.assert_allclose(returned_data, data[:30])
+    np.testing.assert_allclose(full_data[40:], -1)
 
     # Test reverse call
     with cls:
@@ -270,3 +275,66 @@ def test_flow_queue_query(tmp_path, mock_flow_queues):
         ]
         assert cls.get_flow_queues(tag="z1-C") == [mock_flow_queues[2]]
         assert cls.get_flow_queues(tag="z2-D") == [mock_flow_queues[3]]
+
+
+def test_flow_queue_query_after_queue_update(tmp_path, mock_flow_queues):
+    cache_path = tmp_path / "cache_tracking_data.h5"
+    marker_positions = MarkerPositions([], {})
+
+    with TrackingData.initialize(cache_path, marker_positions) as cls:
+        cls.append(mock_flow_queues[0])
+        assert cls.get_flow_queues(camera=2) == []
+
+        # Query reflects appended queues
+        cls.append(mock_flow_queues[2])
+        assert cls.get_flow_queues(camera=2) == [mock_flow_queues[2]]
+
+        # Query reflects reassigned queue list
+        cls.queues = [mock_flow_queues[3]]
+        assert cls.get_flow_queues(camera=2) == []
+        assert cls.get_flow_queues(tag="z2-D") == [mock_flow_queues[3]]
+
+
+def test_flow_queue_query_after_inplace_replacement(tmp_path, mock_flow_queues):
+    cache_path = tmp_path / "cache_tracking_data.h5"
+    marker_positions = MarkerPositions([], {})
+
+    with TrackingData.initialize(cache_path, marker_positions) as cls:
+        for queue in mock_flow_queues:
+            cls.append(queue)
+        assert cls.get_flow_queues(camera=1, force_run_all=True) == [
+            mock_flow_queues[1]
+        ]
+
+        # Replace an entry in place: queue on camera 1 -> queue on camera 2
+        replacement = FlowQueue((20, 20), 0, 10, 2, 3, "E", False)
+        cls.queues[1] = replacement
+        assert cls.get_flow_queues(camera=1, force_run_all=True) == []
+        assert cls.get_flow_queues(camera=2) == [replacement, mock_flow_queues[2]]
+
+        # Remove an entry in place
+        del cls.queues[1]
+        assert cls.get_flow_queues(camera=2) == [mock_flow_queues[2]]
+
+
+def test_append_queue_after_reorder(tmp_path, mock_flow_queues):
+    cache_path = tmp_path / "cache_tracking_data.h5"
+    marker_positions = MarkerPositions([], {})
+
+    with TrackingData.initialize(cache_path, marker_positions) as cls:
+        cls.append(mock_flow_queues[0])
+        cls.append(mock_flow_queues[1])
+
+        # Reorder in place: length is unchanged, indices are not
+        cls.queues.append(cls.queues.pop(0))
+        cls.append(FlowQueue((0, 0), 0, 0, 0, 0, "A", True))
+        assert len(cls.queues) == 2
+        assert cls.queues[1].done
+
+        # Replace in place, then append a queue equal to the replacement
+        replacement = FlowQueue((20, 20), 0, 10, 2, 3, "E", False)
+        cls.queues[0] = replacement
+        cls.append(FlowQueue((20, 20), 0, 10, 2, 3, "E", True))
+        cls.append(mock_flow_queues[1])
+        assert len(cls.queues) == 3
+        assert cls.queues[0].done
@@ -1,5 +1,6 @@
 import operator
 import os
+import sys
 from dataclasses import dataclass
 from typing import List, Tuple
 
@@ -10,6 +11,15 @@ from br2_vision.utility.logging import get_script_logger
 
 from .marker_positions import MarkerPositions
 
+# Number of frames stored per chunk of the trajectory dataset.
+# Chunks hold whole (x, y) rows (64 KiB at int32), so a frame-range read
+# touches few chunks and a full read streams through them in order.
+TRAJECTORY_CHUNK_LENGTH = 8192
+
+# Raw data chunk cache of the h5 file handle kept open inside the context
+H5_CHUNK_CACHE_NBYTES = 64 * 1024 * 1024
+H5_CHUNK_CACHE_NSLOTS = 5003
+
 
 @dataclass
 class FlowQueue:
@@ -47,7 +57,15 @@ class FlowQueue:
     ]
 
     __initialized__ = False
-    __static_variables__ = ["point", "camera", "z_index", "label"]
+    __static_variables__ = frozenset(["point", "camera", "z_index", "label"])
+    __field_types__ = {
+        "start_frame": int,
+        "end_frame": int,
+        "camera": int,
+        "z_index": int,
+        "label": str,
+        "done": bool,
+    }
 
     def __setattr__(self, name, value):
         # type check
@@ -59,52 +77,64 @@ class FlowQueue:
             assert (
                 len(value) == 2
             ), f"Expected length 2, got {len(value)} for parameter {name}"
-            if not all([isinstance(val, int) for val in value]):
+            if not (isinstance(value[0], int) and isinstance(value[1], int)):
                 raise TypeError(
                     f"Expected int, got {[type(val) for val in value]} for parameter {name}"
                 )
-        elif name in ["start_frame", "end_frame", "camera", "z_index"]:
-            if not isinstance(value, int):
-                raise TypeError(f"Expected int, got {type(value)} for parameter {name}")
-        elif name == "label":
-            if not isinstance(value, str):
-                raise TypeError(f"Expected str, got {type(value)} for parameter {name}")
-        elif name == "done":
-            if not isinstance(value, bool):
+        else:
+            expected_type = self.__field_types__.get(name)
+            if expected_type is not None and not isinstance(value, expected_type):
                 raise TypeError(
-                    f"Expected bool, got {type(value)} for parameter {name}"
+                    f"Expected {expected_type.__name__}, got {type(value)} for parameter {name}"
                 )
-        super().__setattr__(name, value)
-        if self.__initialized__:
-            if name in self.__static_variables__:
-                raise AttributeError(f"Cannot change {name} after initialization")
+        if self.__initialized__ and name in self.__static_variables__:
+            raise AttributeError(f"Cannot change {name} after initialization")
+        object.__setattr__(self, name, value)
 
     def __post_init__(self):
         self.__initialized__ = True
 
     def __eq__(self, other):
-        return all(
-            [
-                self.point[0] == other.point[0],
-                self.point[1] == other.point[1],
-                self.start_frame == other.start_frame,
-                self.end_frame == other.end_frame,
-                self.camera == other.camera,
-                self.z_index == other.z_index,
-                self.label == other.label,
-            ]
+        return (
+            self.point,
+            self.start_frame,
+            self.end_frame,
+            self.camera,
+            self.z_index,
+            self.label,
+        ) == (
+            other.point,
+            other.start_frame,
+            other.end_frame,
+            other.camera,
+            other.z_index,
+            other.label,
         )
 
-    def __array__(self, dtype=None) -> np.ndarray:
-        val = np.recarray((1,), dtype=self.dtype)
-        val.point = self.point
-        val.start_frame = self.start_frame
-        val.end_frame = self.end_frame
-        val.camera = self.camera
-        val.z_index = self.z_index
-        val.label = self.label
-        val.done = self.done
-        return val
+    def __hash__(self):
+        # Hash only fixed parameters: they cannot change after initialization.
+        return hash(self.static_key)
+
+    @property
+    def static_key(self):
+        return (self.point, self.camera, self.z_index, self.label)
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        val = np.array(
+            [
+                (
+                    self.point,
+                    self.start_frame,
+                    self.end_frame,
+                    self.camera,
+                    self.z_index,
+                    self.label,
+                    self.done,
+                )
+            ],
+            dtype=self.dtype,
+        )
+        return val.view(np.recarray)
 
     @property
     def h5_directory(self):
@@ -116,6 +146,71 @@ class FlowQueue:
         return f"z{z_index}-{label}"
 
 
+class _FlowQueueList(list):
+    """
+    List of FlowQueue that counts in-place modifications.
+    TrackingData uses the count to invalidate caches built from the list.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.version = 0
+
+    def _modified(self):
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._modified()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._modified()
+
+    def __iadd__(self, other):
+        result = super().__iadd__(other)
+        self._modified()
+        return result
+
+    def __imul__(self, other):
+        result = super().__imul__(other)
+        self._modified()
+        return result
+
+    def append(self, value):
+        super().append(value)
+        self._modified()
+
+    def extend(self, values):
+        super().extend(values)
+        self._modified()
+
+    def insert(self, index, value):
+        super().insert(index, value)
+        self._modified()
+
+    def pop(self, index=-1):
+        value = super().pop(index)
+        self._modified()
+        return value
+
+    def remove(self, value):
+        super().remove(value)
+        self._modified()
+
+    def clear(self):
+        super().clear()
+        self._modified()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._modified()
+
+    def reverse(self):
+        super().reverse()
+        self._modified()
+
+
 def raise_if_outside_context(method):  # pragma: no cover
     def decorator(self, *args, **kwargs):
         if not self._inside_context:
@@ -131,20 +226,40 @@ class TrackingData:
     """
 
     def __init__(self, path, marker_positions: MarkerPositions):
-        self.queues: List[FlowQueue] = []
+        self._queues = _FlowQueueList()
         self.path = path
         self.marker_positions = marker_positions
 
         self.logger = get_script_logger(os.path.basename(__file__))
 
         self._inside_context = False
+        self._h5f = None
+
+        # Cached arrays of fixed queue fields, used by get_flow_queues
+        self._index_version = None
+        self._camera_index = None
+        self._tag_index = None
+
+        # Map FlowQueue.static_key to queue indices, used by append
+        self._lookup_version = None
+        self._queue_lookup = {}
+
+    @property
+    def queues(self) -> List[FlowQueue]:
+        return self._queues
+
+    @queues.setter
+    def queues(self, value: List[FlowQueue]):
+        # Copy into a tracked list: any later modification invalidates caches
+        self._queues = _FlowQueueList(value)
+        self._index_version = None
+        self._lookup_version = None
 
     @property
     @raise_if_outside_context
     def all_done(self):
-        if len(self.queues) == 0:
-            return True
-        return all([q.done for q in self.queues])
+        # Stop at the first pending queue
+        return all(q.done for q in self.queues)
 
     @raise_if_outside_context
     def iter_cameras(self):
@@ -184,40 +299,41 @@ class TrackingData:
             Save full trajectory if True, otherwise save only the trajectory between start_frame and end_frame.
             (default: False)
         """
-        # Create directory
-        with h5py.File(self.path, "a") as h5f:
-            # Check if directory exists
-            grp = h5f.require_group(flow_queue.h5_directory)
-            if prefix in grp:
-                dset = grp[prefix]
-                if size is not None:
-                    assert (
-                        dset.shape[0] == size
-                    ), f"Size mismatch: {dset.shape[0]} != {size}"
-            else:
-                # initialize dataset with nan
+        # Create directory (if doesn't exist)
+        grp = self._h5f.require_group(flow_queue.h5_directory)
+        if prefix in grp:
+            dset = grp[prefix]
+            if size is not None:
                 assert (
-                    size is not None
-                ), "Trajectory size should be provided if dataset label does not exist."
-                shape = (size, 2)
-                dset = grp.create_dataset(
-                    prefix,
-                    shape,
-                    dtype=np.int_,
-                    data=np.full(shape, -1, dtype=np.int_),
-                )
-                dset.attrs["unit"] = "pixel"
+                    dset.shape[0] == size
+                ), f"Size mismatch: {dset.shape[0]} != {size}"
+        else:
+            # initialize dataset with -1 (unfilled frames)
+            assert (
+                size is not None
+            ), "Trajectory size should be provided if dataset label does not exist."
+            shape = (size, 2)
+            dset = grp.create_dataset(
+                prefix,
+                shape,
+                dtype=np.int32,
+                fillvalue=-1,
+                chunks=(min(TRAJECTORY_CHUNK_LENGTH, size), 2),
+                compression="lzf",
+                shuffle=True,
+            )
+            dset.attrs["unit"] = "pixel"
 
-            if full_trajectory:
-                assert (
-                    dset.shape == data.shape
-                ), f"Shape mismatch: {dset.shape} != {data.shape}"
-                dset[...] = data
-            else:
-                assert (
-                    flow_queue.end_frame - flow_queue.start_frame == data.shape[0]
-                ), f"Shape mismatch: nframes:{flow_queue.end_frame - flow_queue.start_frame} != ndata:{data.shape[0]}"
-                dset[flow_queue.start_frame : flow_queue.end_frame] = data
+        if full_trajectory:
+            assert (
+                dset.shape == data.shape
+            ), f"Shape mismatch: {dset.shape} != {data.shape}"
+            dset[...] = data
+        else:
+            assert (
+                flow_queue.end_frame - flow_queue.start_frame == data.shape[0]
+            ), f"Shape mismatch: nframes:{flow_queue.end_frame - flow_queue.start_frame} != ndata:{data.shape[0]}"
+            dset[flow_queue.start_frame : flow_queue.end_frame] = data
 
     @raise_if_outside_context
     def load_pixel_flow_trajectory(
@@ -226,15 +342,14 @@ class TrackingData:
         """
         Load trajectory from h5 file
         """
-        with h5py.File(self.path, "r") as h5f:
-            grp = h5f[flow_queue.h5_directory]
-            dset = grp[prefix]
-            if full_trajectory:
-                return np.array(dset[:], dtype=np.int_)
-            else:
-                return np.array(
-                    dset[flow_queue.start_frame : flow_queue.end_frame], dtype=np.int_
-                )
+        grp = self._h5f[flow_queue.h5_directory]
+        dset = grp[prefix]
+        if full_trajectory:
+            return np.array(dset[:], dtype=np.int_)
+        else:
+            return np.array(
+                dset[flow_queue.start_frame : flow_queue.end_frame], dtype=np.int_
+            )
 
     @raise_if_outside_context
     def trim_trajectory(
@@ -251,27 +366,14 @@ class TrackingData:
         # find queue with matching tag
         for q in self.queues:
             if q.get_tag() == tag and frame >= q.start_frame and frame <= q.end_frame:
-                # load trajectory
-                relative_frame = frame - q.start_frame
-                trajectory = self.load_pixel_flow_trajectory(
-                    q,
-                    prefix=prefix,
-                )
+                # Overwrite only the trimmed frames: no need to read the
+                # trajectory, and only the chunks overlapping the range are touched.
+                dset = self._h5f[q.h5_directory][prefix]
                 if reverse:
-                    trajectory[:relative_frame] = -1
-                    self.save_pixel_flow_trajectory(
-                        trajectory,
-                        q,
-                        prefix=prefix,
-                    )
+                    dset[q.start_frame : frame] = -1
                     q.start_frame = frame
                 else:
-                    trajectory[relative_frame:] = -1
-                    self.save_pixel_flow_trajectory(
-                        trajectory,
-                        q,
-                        prefix=prefix,
-                    )
+                    dset[frame : q.end_frame] = -1
                     q.end_frame = frame
 
     @classmethod
@@ -289,15 +391,24 @@ class TrackingData:
         marker_positions = MarkerPositions.from_h5(path)
         with h5py.File(path, "r") as h5f:
             # Load queues
-            dset = h5f["queues"]
-            queues = []
-            for vals in dset[...].tolist():
-                # Convert to FlowQueue datatype
-                vals = list(vals)
-                vals[0] = tuple(int(vals[0][i]) for i in range(2))
-                vals[5] = vals[5].decode()
-                fq = FlowQueue(*vals)
-                queues.append(fq)
+            arr = h5f["queues"][...]
+        # Convert each column to python types at once
+        points = arr["point"].tolist()
+        start_frames = arr["start_frame"].tolist()
+        end_frames = arr["end_frame"].tolist()
+        cameras = arr["camera"].tolist()
+        z_indices = arr["z_index"].tolist()
+        # Labels repeat across queues: decode each distinct label once
+        unique_labels, label_inverse = np.unique(arr["label"], return_inverse=True)
+        decoded_labels = [sys.intern(b.decode()) for b in unique_labels.tolist()]
+        labels = [decoded_labels[i] for i in label_inverse.ravel().tolist()]
+        dones = arr["done"].tolist()
+        queues = [
+            FlowQueue(tuple(p), s, e, c, z, l, d)
+            for p, s, e, c, z, l, d in zip(
+                points, start_frames, end_frames, cameras, z_indices, labels, dones
+            )
+        ]
         # Reset parameters
         c = cls(path, marker_positions=marker_positions)
         c.queues = queues
@@ -316,6 +427,7 @@ class TrackingData:
                 "queues",
                 (1,),
                 maxshape=(None,),
+                chunks=(256,),
                 dtype=FlowQueue.dtype,
             )
         self.marker_positions.to_h5(self.path)
@@ -327,27 +439,70 @@ class TrackingData:
         self._inside_context = True
         if not os.path.exists(self.path):
             self.create_template()
+        # Keep the file open for the duration of the context
+        self._h5f = h5py.File(
+            self.path,
+            "a",
+            rdcc_nbytes=H5_CHUNK_CACHE_NBYTES,
+            rdcc_nslots=H5_CHUNK_CACHE_NSLOTS,
+        )
         return self
 
     def __exit__(self, exception_type, exception_value, exception_traceback):
         """
         Save queue on the existing file
         """
-        with h5py.File(self.path, "a") as h5f:
-            dset = h5f["queues"]
+        try:
+            dset = self._h5f["queues"]
             dset.resize((len(self.queues),))
-            for idx, q in enumerate(self.queues):
-                dset[idx] = np.array(q)
-        self._inside_context = False
+            if len(self.queues) > 0:
+                arr = np.empty(len(self.queues), dtype=FlowQueue.dtype)
+                arr["point"] = [q.point for q in self.queues]
+                arr["start_frame"] = [q.start_frame for q in self.queues]
+                arr["end_frame"] = [q.end_frame for q in self.queues]
+                arr["camera"] = [q.camera for q in self.queues]
+                arr["z_index"] = [q.z_index for q in self.queues]
+                arr["label"] = [q.label for q in self.queues]
+                arr["done"] = [q.done for q in self.queues]
+                dset[...] = arr
+        finally:
+            self._h5f.close()
+            self._h5f = None
+            self._inside_context = False
 
     @raise_if_outside_context
     def append(self, value: FlowQueue):
         # if same value is already in the list, replace values
-        if value in self.queues:
-            idx = self.queues.index(value)
-            self.queues[idx] = value
+        if self._lookup_version != self._queues.version:
+            self._queue_lookup = {}
+            for idx, q in enumerate(self._queues):
+                self._queue_lookup.setdefault(q.static_key, []).append(idx)
+
+        candidates = self._queue_lookup.setdefault(value.static_key, [])
+        for idx in candidates:
+            if self._queues[idx] == value:
+                # Equal queues share the static key: lookup stays valid
+                self._queues[idx] = value
+                break
         else:
-            self.queues.append(value)
+            candidates.append(len(self._queues))
+            self._queues.append(value)
+        # The lookup was updated along with the modification above
+        self._lookup_version = self._queues.version
+
+    def _get_queue_index(self):
+        """
+        Return arrays of camera id and tag for each queue.
+        Only fixed parameters are cached; the cache is rebuilt whenever
+        self.queues is reassigned or modified.
+        """
+        if self._index_version != self._queues.version:
+            self._camera_index = np.array(
+                [q.camera for q in self._queues], dtype=np.int_
+            )
+            self._tag_index = np.array([q.get_tag() for q in self._queues], dtype=str)
+            self._index_version = self._queues.version
+        return self._camera_index, self._tag_index
 
     @raise_if_outside_context
     def get_flow_queues(
@@ -356,15 +511,20 @@ class TrackingData:
         """
         General filter method
         """
+        # Filter by fixed parameters
+        cameras, tags = self._get_queue_index()
+        mask = np.ones(len(self.queues), dtype=bool)
+        if camera is not None:
+            mask &= cameras == camera
+        if tag is not None:
+            mask &= tags == tag
+
         ret = []
-        for queue in self.queues:
-            # Filter
-            if camera is not None and queue.camera != camera:
-                continue
+        for idx in np.flatnonzero(mask):
+            queue = self.queues[idx]
+            # Filter by adjustable parameters
             if start_frame is not None and queue.start_frame != start_frame:
                 continue
-            if tag is not None and queue.get_tag() != tag:
-                continue
 
             # Skip already-done queues
             if queue.done and not force_run_all:
@@ -0,0 +1,52 @@
+import cv2
+import numpy as np
+import pytest
+
+from br2_vision.undistort import (
+    apply_undistort_maps,
+    get_undistort_maps,
+    is_cuda_available,
+    undistort,
+)
+
+
+def test_is_cuda_available_without_device(mocker):
+    mocker.patch.object(cv2.cuda, "getCudaEnabledDeviceCount", return_value=0)
+    assert not is_cuda_available()
+
+
+def test_is_cuda_available_with_device(mocker):
+    mocker.patch.object(cv2.cuda, "getCudaEnabledDeviceCount", return_value=1)
+    assert is_cuda_available()
+
+
+def test_undistort_maps_cached(mocker, calibration_file):
+    spy = mocker.spy(cv2.fisheye, "initUndistortRectifyMap")
+    image = np.zeros((48, 64, 3), dtype=np.uint8)
+    undistort(image, 64, 48, calibration_file)
+    undistort(image, 64, 48, calibration_file)
+    assert spy.call_count == 1
+
+
+def test_undistort_maps_cuda_uploaded(mocker, calibration_file):
+    gpu_mat = mocker.patch.object(cv2, "cuda_GpuMat", create=True)
+    map1, map2 = get_undistort_maps(calibration_file, 64, 48, use_cuda=True)
+    # Float maps are required by cv2.cuda.remap
+    uploaded = [call.args[0] for call in gpu_mat.call_args_list]
+    assert len(uploaded) == 2
+    assert all(m.dtype == np.float32 for m in uploaded)
+    assert map1 is gpu_mat.return_value and map2 is gpu_mat.return_value
+
+
+def test_apply_undistort_maps_cuda(mocker):
+    image = np.zeros((48, 64, 3), dtype=np.uint8)
+    gpu_mat = mocker.patch.object(cv2, "cuda_GpuMat", create=True)
+    remap = mocker.patch.object(cv2.cuda, "remap", create=True)
+    remap.return_value.download.return_value = image
+    map1, map2 = object(), object()
+
+    result = apply_undistort_maps(image, map1, map2, use_cuda=True)
+
+    gpu_mat.assert_called_once_with(image)
+    assert remap.call_args.args == (gpu_mat.return_value, map1, map2)
+    assert result is image
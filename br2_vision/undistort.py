@@ -1,5 +1,11 @@
-__all__ = ["undistort"]
+__all__ = [
+    "undistort",
+    "get_undistort_maps",
+    "apply_undistort_maps",
+    "is_cuda_available",
+]
 
+import functools
 import glob
 import os
 import pathlib
@@ -9,16 +15,56 @@ import cv2
 import numpy as np
 
 
-def undistort(image, width, height, calibration_file: pathlib.Path):
+def is_cuda_available() -> bool:
+    """
+    Check if OpenCV is built with CUDA and a device is present.
+    """
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except (AttributeError, cv2.error):
+        return False
+
+
+@functools.lru_cache(maxsize=None)
+def get_undistort_maps(
+    calibration_file: pathlib.Path, width: int, height: int, use_cuda: bool = False
+):
+    """
+    Load calibration and compute the remap tables.
+    The result is cached per (calibration_file, width, height, use_cuda), so
+    the calibration file is read only once per process for each setting.
+
+    If use_cuda is True, the maps are returned as float maps uploaded to the GPU.
+    """
     dim = (width, height)
     with open(calibration_file, "rb") as f:
         params = pkl.load(f)
         k = params["K"]
         d = params["D"]
 
+    map_type = cv2.CV_32FC1 if use_cuda else cv2.CV_16SC2
     map1, map2 = cv2.fisheye.initUndistortRectifyMap(
-        k, d, np.eye(3), k, dim, cv2.CV_16SC2
+        k, d, np.eye(3), k, dim, map_type
     )
+    if use_cuda:
+        map1, map2 = cv2.cuda_GpuMat(map1), cv2.cuda_GpuMat(map2)
+    return map1, map2
+
+
+def apply_undistort_maps(image, map1, map2, use_cuda: bool = False):
+    """
+    Remap image with precomputed maps from get_undistort_maps.
+    """
+    if use_cuda:
+        gpu_image = cv2.cuda_GpuMat(image)
+        gpu_image = cv2.cuda.remap(
+            gpu_image,
+            map1,
+            map2,
+            interpolation=cv2.INTER_LINEAR,
+            borderMode=cv2.BORDER_CONSTANT,
+        )
+        return gpu_image.download()
     undistorted_image = cv2.remap(
         image,
         map1,
@@ -29,6 +75,13 @@ def undistort(image, width, height, calibration_file: pathlib.Path):
     return undistorted_image
 
 
+def undistort(
+    image, width, height, calibration_file: pathlib.Path, use_cuda: bool = False
+):
+    map1, map2 = get_undistort_maps(calibration_file, width, height, use_cuda)
+    return apply_undistort_maps(image, map1, map2, use_cuda)
+
+
 if __name__ == "__main__":
     # Calibrated: 06/22/2021
     # DIM = (1920, 1080)
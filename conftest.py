@@ -0,0 +1,20 @@
+import pickle
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def calibration_file(tmp_path):
+    """
+    Fisheye calibration file (K, D) for a 64x48 image without distortion.
+    """
+    from br2_vision.undistort import get_undistort_maps
+
+    path = tmp_path / "calibration.pkl"
+    k = np.array([[50.0, 0.0, 32.0], [0.0, 50.0, 24.0], [0.0, 0.0, 1.0]])
+    d = np.zeros((4, 1))
+    with open(path, "wb") as f:
+        pickle.dump({"K": k, "D": d}, f)
+    yield path
+    get_undistort_maps.cache_clear()
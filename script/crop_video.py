@@ -9,6 +9,7 @@ import os
 import pathlib
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Tuple
 
 import click
@@ -27,6 +28,7 @@ def crop_video(
     section: Tuple[int, int],
     input_path: str,
     output_path: str,
+    cuda: bool = False,
 ):
     """
     Crop video using ffmpeg.
@@ -34,18 +36,27 @@ def crop_video(
         (x,y): (distance from left, distance from top)
     section (width-delta x, height-delta y)
     Assume position and section are in pixels.
+    If cuda is True, decode/encode on GPU (NVDEC/NVENC). Fall back to CPU if it fails.
     """
     width, height = section
     x, y = position
 
     command = ["ffmpeg", "-y"]
+    if cuda:
+        command.extend(["-hwaccel", "cuda"])
     command.extend(["-i", input_path])
     command.extend(["-vf", f"crop={width}:{height}:{x}:{y}"])
+    if cuda:
+        command.extend(["-c:v", "h264_nvenc"])
     command.extend([output_path])
-    command = " ".join(command)
-    print("running : ", command)
+    print("running : ", " ".join(command))
 
-    sts = subprocess.Popen(command, shell=True).wait()
+    # Detach stdin: concurrent ffmpeg processes would otherwise compete for
+    # keyboard input and the terminal mode of the interactive session.
+    sts = subprocess.Popen(command, stdin=subprocess.DEVNULL).wait()
+    if sts != 0 and cuda:
+        print("GPU crop failed. Retry on CPU : ", input_path)
+        return crop_video(position, section, input_path, output_path, cuda=False)
     return sts
 
 
@@ -62,9 +73,14 @@ def crop_video(
     help="Region of interest for cropping. (x,y,width,height). Used for all cameras.",
     default=None,
 )
+@click.option(
+    "--cuda",
+    is_flag=True,
+    help="Use ffmpeg CUDA decoding and NVENC encoding. Fall back to CPU on failure.",
+)
 @click.option("-v", "--verbose", is_flag=True, help="Verbose mode.")
 @click.option("-d", "--dry", is_flag=True, help="Dry run.")
-def process(cam_id, skip_synch: bool, roi, verbose: bool, dry: bool):
+def process(cam_id, skip_synch: bool, roi, cuda: bool, verbose: bool, dry: bool):
     """
     Crop video using ffmpeg.
     """
@@ -96,14 +112,22 @@ def process(cam_id, skip_synch: bool, roi, verbose: bool, dry: bool):
         for cid in cam_id:
             rois[cid] = roi
 
-    # Crop video
-    for i in tqdm(cam_id):
-        roi = rois[i]
-        _input_path = video_path.format(i)
-        _output_path = output_path.format(i)
-        positions = (roi[0], roi[1])
-        section = (roi[2], roi[3])
-        crop_video(positions, section, _input_path, _output_path)
+    # Crop video: run one ffmpeg process per camera concurrently
+    with ThreadPoolExecutor(max_workers=max(len(cam_id), 1)) as executor:
+        futures = []
+        for i in cam_id:
+            roi = rois[i]
+            _input_path = video_path.format(i)
+            _output_path = output_path.format(i)
+            positions = (roi[0], roi[1])
+            section = (roi[2], roi[3])
+            futures.append(
+                executor.submit(
+                    crop_video, positions, section, _input_path, _output_path, cuda
+                )
+            )
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            future.result()
 
 
 if __name__ == "__main__":
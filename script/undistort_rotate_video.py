@@ -4,9 +4,10 @@ import logging
 import multiprocessing as mp
 import os
 import pathlib
+import subprocess
 import sys
+import threading
 import time
-from functools import partial
 
 import click
 import cv2
@@ -15,25 +16,104 @@ import psutil
 from tqdm import tqdm
 
 import br2_vision
-from br2_vision.undistort import undistort
+from br2_vision.undistort import (
+    apply_undistort_maps,
+    get_undistort_maps,
+    is_cuda_available,
+)
 from br2_vision.utility.logging import config_logging, get_script_logger
 
 
-def process_frame(frame, calibration_file, rotate):
+# Per-worker state, set once by init_worker
+_undistort_maps = None
+_rotate = None
+_use_cuda = False
+_init_error = None
+
+
+def init_worker(calibration_file, size, rotate, use_cuda=False):
+    """
+    Pool initializer: load calibration and compute undistortion maps once
+    per worker process, instead of passing them with every frame.
+    size is the (width, height) of the input frames.
+
+    An exception raised from a pool initializer makes the pool respawn
+    workers forever, so errors are kept and re-raised from process_frame.
+    """
+    global _undistort_maps, _rotate, _use_cuda, _init_error
+    try:
+        width, height = size
+        _undistort_maps = get_undistort_maps(
+            calibration_file, width, height, use_cuda
+        )
+        _rotate = rotate
+        _use_cuda = use_cuda
+    except Exception as e:
+        _init_error = e
+
+
+def process_frame(frame):
+    if _init_error is not None:
+        raise _init_error
+
     # Monitor memory usage
     # print(psutil.virtual_memory())
 
     # Undistort
-    height, width = frame.shape[:2]
-    frame = undistort(frame, width, height, calibration_file)
+    frame = apply_undistort_maps(frame, *_undistort_maps, use_cuda=_use_cuda)
 
     # Rotate (Must be done after undistort)
-    if rotate != None:
-        frame = cv2.rotate(frame, rotate)
+    if _rotate != None:
+        frame = cv2.rotate(frame, _rotate)
 
     return frame
 
 
+def get_pool_context(use_cuda=False):
+    """
+    Multiprocessing context for the undistortion pool.
+    CUDA is not fork-safe once initialized in the parent (is_cuda_available
+    already does that), so GPU workers are started with spawn.
+    """
+    if use_cuda:
+        return mp.get_context("spawn")
+    return mp.get_context()
+
+
+def read_frames(video, semaphore, stop_event):
+    """
+    Yield frames from the video capture.
+    The semaphore bounds the number of frames read ahead of the writer.
+    Stop reading once stop_event is set.
+    """
+    while True:
+        semaphore.acquire()
+        if stop_event.is_set():
+            break
+        ret, frame = video.read()
+        if not ret:
+            break
+        yield frame
+
+
+def open_ffmpeg_writer(save_path, size, fps, codec, preset="ultrafast", crf=18):
+    """
+    Open ffmpeg subprocess that encodes raw BGR frames from stdin.
+    ffmpeg runs the encoder on its own threads, concurrently with the
+    undistortion workers. preset and crf apply to the libx264/libx265 encoders.
+    """
+    width, height = size
+    command = ["ffmpeg", "-y", "-loglevel", "error"]
+    command.extend(["-f", "rawvideo", "-pix_fmt", "bgr24"])
+    command.extend(["-s", f"{width}x{height}", "-framerate", str(fps)])
+    command.extend(["-i", "pipe:"])
+    command.extend(["-c:v", codec, "-pix_fmt", "yuv420p"])
+    if codec in ("libx264", "libx265"):
+        command.extend(["-preset", preset, "-crf", str(crf)])
+    command.extend([save_path])
+    return subprocess.Popen(command, stdin=subprocess.PIPE)
+
+
 @click.command()
 @click.option(
     "-cam", "--cam-id", type=int, help="Camera index given in file.", multiple=True
@@ -51,6 +131,30 @@ def process_frame(frame, calibration_file, rotate):
     default=60,
     help="Output video FPS. Try to match the original video settings.",
 )
+@click.option(
+    "--codec",
+    type=str,
+    default="libx264",
+    help="ffmpeg video encoder. Use h264_nvenc for NVIDIA hardware encoding. (default: libx264)",
+)
+@click.option(
+    "--preset",
+    type=str,
+    default="ultrafast",
+    help="x264/x265 encoding preset. (default: ultrafast)",
+)
+@click.option(
+    "--crf",
+    type=int,
+    default=18,
+    help="x264/x265 constant rate factor. Lower is higher quality. (default: 18)",
+)
+@click.option(
+    "--cuda",
+    is_flag=True,
+    default=False,
+    help="Undistort on GPU with cv2.cuda. Requires OpenCV built with CUDA.",
+)
 @click.option("-v", "--verbose", is_flag=True, default=False, help="Verbose")
 @click.option("-d", "--dry", is_flag=True, default=False, help="Dry run")
 @click.option(
@@ -78,6 +182,10 @@ def undistort_and_rotate(
     cam_id,
     rotate,
     output_fps,
+    codec,
+    preset,
+    crf,
+    cuda,
     verbose,
     dry,
     processes,
@@ -95,7 +203,13 @@ def undistort_and_rotate(
     logger.info(f"using {processes=} processes")
 
     calibration_file = config["PATHS"]["fisheye_configuration"]
-    os.path.exists(calibration_file), f"calibration file not found: {calibration_file}"
+    assert os.path.exists(
+        calibration_file
+    ), f"calibration file not found: {calibration_file}"
+
+    if cuda and not is_cuda_available():
+        logger.warning("CUDA is not available in OpenCV. Undistort on CPU.")
+        cuda = False
 
     if rotate is not None:
         cv2_rotation = getattr(cv2, rotate, None)
@@ -132,6 +246,7 @@ def undistort_and_rotate(
 
         frame_width = int(video.get(3))
         frame_height = int(video.get(4))
+        input_size = (frame_width, frame_height)
         if (
             cv2_rotation is cv2.ROTATE_90_CLOCKWISE
             or cv2_rotation is cv2.ROTATE_90_COUNTERCLOCKWISE
@@ -140,54 +255,70 @@ def undistort_and_rotate(
         size = (frame_width, frame_height)  # Make sure the size is upright
         logger.info(f"video size: {frame_width=}x{frame_height=}")
 
-        # Below VideoWriter object will create
-        # a frame of above defined The output
-        output_writer = cv2.VideoWriter(
-            save_path, cv2.VideoWriter_fourcc(*"mp4v"), output_fps, size
+        # Load calibration in the parent first: fail early on a bad file
+        get_undistort_maps(calibration_file, *input_size)
+
+        pool = get_pool_context(cuda).Pool(
+            processes=processes,
+            initializer=init_worker,
+            initargs=(calibration_file, input_size, cv2_rotation, cuda),
+        )
+
+        # Encode output through ffmpeg pipe
+        # (open after the pool is started, so forked workers do not inherit the pipe)
+        output_writer = open_ffmpeg_writer(
+            save_path, size, output_fps, codec, preset=preset, crf=crf
         )
 
         logger.info("writing video...")
         total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
         pbar = tqdm(total=total_frames)
 
-        pool = mp.Pool(processes=processes)
         stime = time.time()
-        done_flag = False
-        while not done_flag:
-            chunk = []  # TODO: Try to collect frames in parallel
-            for n in range(chunksize * processes):
-                ret, frame = video.read()
-                if not ret:
-                    done_flag = True
-                    break
-                chunk.append(frame)
-            if len(chunk) > 0:
-                func = partial(
-                    process_frame,
-                    calibration_file=calibration_file,
-                    rotate=cv2_rotation,
-                )
-                results = pool.map(func, chunk, chunksize=chunksize)
-                pbar.update(len(results))
-
-                # Write video
-                shape = results[0].shape
+        # Stream frames: results are written as soon as they are ready,
+        # while at most `2 * chunksize * processes` frames are in flight.
+        semaphore = threading.Semaphore(2 * chunksize * processes)
+        stop_event = threading.Event()
+        pipe_broken = False
+        try:
+            for frame in pool.imap(
+                process_frame,
+                read_frames(video, semaphore, stop_event),
+                chunksize=chunksize,
+            ):
+                shape = frame.shape
                 assert (
                     shape[0] == frame_height and shape[1] == frame_width
                 ), f"shape={shape} != {frame_height}x{frame_width}x3"
-                for frame in results:
-                    # check nan
-                    _frame = cv2.resize(frame, (frame_width, frame_height))
-                    output_writer.write(_frame)
+                # Write video (size is checked above; no resize needed)
+                output_writer.stdin.write(np.ascontiguousarray(frame).data)
+                semaphore.release()
+                pbar.update(1)
+        except BrokenPipeError:
+            # ffmpeg exited early: stop reading frames and drop the workers
+            pipe_broken = True
+            stop_event.set()
+            semaphore.release()
+            pool.terminate()
 
         # When everything done, release
         # the video capture and video
         # write objects
         video.release()
-        output_writer.release()
+        try:
+            output_writer.stdin.close()
+        except BrokenPipeError:
+            pipe_broken = True
+        returncode = output_writer.wait()
         pbar.close()
         pool.close()
 
+        if pipe_broken or returncode != 0:
+            logger.error(
+                f"ffmpeg failed with return code {returncode}. "
+                f"The video may be incomplete - {save_path}"
+            )
+            continue
         logger.info("The video was successfully saved - {}".format(save_path))
         logger.info(f"took {time.time() - stime:.2f} seconds")
     logger.info("done")
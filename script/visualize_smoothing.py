@@ -37,15 +37,11 @@ from smoothing import create_data_object, read_data_from_file
 
 def rotate_frame(orientation, position=None, director=None):
     if position is not None:
-        new_position = np.zeros(position.shape)
-        for n in range(position.shape[1]):
-            new_position[:, n] = orientation @ position[:, n]
-        return new_position
+        # (3, 3) @ (3, N)
+        return orientation @ position
     if director is not None:
-        new_director = np.zeros(director.shape)
-        for n in range(director.shape[2]):
-            new_director[:, :, n] = director[:, :, n] @ orientation.T
-        return new_director
+        # director[:, :, n] @ orientation.T for each n
+        return np.einsum("ijn,kj->ikn", director, orientation)
     return None
 
 
@@ -101,9 +97,19 @@ def create_movie(file_name, delta_s_position):
         ax3d_flag=True,
     )
 
+    # Rotate all timesteps at once: (T, 3, N) and (T, 3, 3, N-1)
+    rotated_positions = np.einsum("ij,kjn->kin", orientation, position)
+    rotated_directors = np.einsum("kijn,lj->kiln", director, orientation)
+    # Subsampled element midpoints and directors for the director plot
+    rotated_midpoints = 0.5 * (
+        rotated_positions[:, :, 1:] + rotated_positions[:, :, :-1]
+    )
+    sampled_midpoints = np.ascontiguousarray(rotated_midpoints[:, :, ::-5])
+    sampled_directors = np.ascontiguousarray(rotated_directors[:, :, :, ::-5])
+
     rest_lengths = np.linalg.norm(position[0][:, 1:] - position[0][:, :-1], axis=0)
     frame.set_ref_configuration(
-        position=rotate_frame(orientation, position=position[0]),
+        position=rotated_positions[0],
         shear=shear[0],
         kappa=kappa[0],
         reference_length=rest_lengths,
@@ -113,8 +119,8 @@ def create_movie(file_name, delta_s_position):
     for k in tqdm(range(len(time))):
         frame.reset()
         rod_ax = frame.plot_rod(
-            position=rotate_frame(orientation, position=position[k]),
-            director=rotate_frame(orientation, director=director[k]),
+            position=rotated_positions[k],
+            director=rotated_directors[k],
             radius=radius[k],
             color="black",
         )
@@ -132,11 +138,9 @@ def create_movie(file_name, delta_s_position):
                 ),
             )
 
-        position_for_director = (position[k][:, 1:] + position[k][:, :-1]) / 2
-
         frame.plot_data(
-            position=rotate_frame(orientation, position=position_for_director[:, ::-5]),
-            director=rotate_frame(orientation, director=director[k][:, :, ::-5]),
+            position=sampled_midpoints[k],
+            director=sampled_directors[k],
             color="black",
         )
 
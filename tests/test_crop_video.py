@@ -0,0 +1,52 @@
+import subprocess
+
+from script.crop_video import crop_video
+
+
+def test_crop_video_command(mocker):
+    popen = mocker.patch("script.crop_video.subprocess.Popen")
+    popen.return_value.wait.return_value = 0
+
+    sts = crop_video((10, 20), (100, 80), "input.mp4", "output.mp4")
+
+    assert sts == 0
+    popen.assert_called_once()
+    command = popen.call_args.args[0]
+    assert command == [
+        "ffmpeg",
+        "-y",
+        "-i",
+        "input.mp4",
+        "-vf",
+        "crop=100:80:10:20",
+        "output.mp4",
+    ]
+    assert "shell" not in popen.call_args.kwargs
+    assert popen.call_args.kwargs["stdin"] is subprocess.DEVNULL
+
+
+def test_crop_video_cuda_fallback(mocker):
+    popen = mocker.patch("script.crop_video.subprocess.Popen")
+    popen.return_value.wait.side_effect = [1, 0]
+
+    sts = crop_video((10, 20), (100, 80), "input.mp4", "output.mp4", cuda=True)
+
+    assert sts == 0
+    assert popen.call_count == 2
+    gpu_command = popen.call_args_list[0].args[0]
+    cpu_command = popen.call_args_list[1].args[0]
+    assert "-hwaccel" in gpu_command and "h264_nvenc" in gpu_command
+    assert "-hwaccel" not in cpu_command and "h264_nvenc" not in cpu_command
+    for call in popen.call_args_list:
+        assert isinstance(call.args[0], list)
+        assert "shell" not in call.kwargs
+
+
+def test_crop_video_cpu_failure_not_retried(mocker):
+    popen = mocker.patch("script.crop_video.subprocess.Popen")
+    popen.return_value.wait.return_value = 1
+
+    sts = crop_video((10, 20), (100, 80), "input.mp4", "output.mp4")
+
+    assert sts == 1
+    popen.assert_called_once()
@@ -0,0 +1,127 @@
+import logging
+import multiprocessing as mp
+import pickle
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from script.undistort_rotate_video import (
+    get_pool_context,
+    init_worker,
+    open_ffmpeg_writer,
+    process_frame,
+    undistort_and_rotate,
+)
+
+
+def test_pool_context_spawn_for_cuda():
+    assert get_pool_context(use_cuda=True).get_start_method() == "spawn"
+    assert get_pool_context(use_cuda=False).get_start_method() == mp.get_start_method()
+
+
+def test_spawn_pool_worker_runs(calibration_file):
+    # Workers must be importable and initialized from scratch under spawn.
+    frames = [np.full((48, 64, 3), i, dtype=np.uint8) for i in range(4)]
+    with get_pool_context(use_cuda=True).Pool(
+        processes=2,
+        initializer=init_worker,
+        initargs=(calibration_file, (64, 48), None, False),
+    ) as pool:
+        results = list(pool.imap(process_frame, frames))
+    assert len(results) == 4
+    assert all(result.shape == (48, 64, 3) for result in results)
+
+
+def test_worker_init_error_raised(tmp_path):
+    # A failing initializer must surface the error, not respawn workers forever.
+    frames = [np.zeros((48, 64, 3), dtype=np.uint8) for _ in range(4)]
+    with get_pool_context().Pool(
+        processes=2,
+        initializer=init_worker,
+        initargs=(tmp_path / "missing.pkl", (64, 48), None, False),
+    ) as pool:
+        with pytest.raises(FileNotFoundError):
+            pool.map_async(process_frame, frames).get(timeout=30)
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch, calibration_file):
+    """
+    Working directory with br2_vision.ini, a short raw video for camera 0,
+    and the calibration file.
+    """
+    monkeypatch.chdir(tmp_path)
+    writer = cv2.VideoWriter(
+        str(tmp_path / "raw0.mp4"), cv2.VideoWriter_fourcc(*"mp4v"), 30, (64, 48)
+    )
+    for i in range(10):
+        writer.write(np.full((48, 64, 3), i * 20, dtype=np.uint8))
+    writer.release()
+    with open(tmp_path / "br2_vision.ini", "w") as f:
+        f.write(
+            "[PATHS]\n"
+            f"fisheye_configuration : {calibration_file}\n"
+            f"raw_video_path : {tmp_path}/raw{{}}.mp4\n"
+            f"undistorted_video_path : {tmp_path}/undistorted{{}}.mp4\n"
+        )
+    return tmp_path
+
+
+def test_missing_calibration_file_fails(workspace, calibration_file):
+    calibration_file.unlink()
+    result = CliRunner().invoke(undistort_and_rotate, ["-cam", "0", "-p", "2"])
+    assert isinstance(result.exception, AssertionError)
+
+
+def test_bad_calibration_file_fails(workspace, calibration_file):
+    calibration_file.write_bytes(b"not a calibration file")
+    result = CliRunner().invoke(undistort_and_rotate, ["-cam", "0", "-p", "2"])
+    assert isinstance(result.exception, pickle.UnpicklingError)
+    assert not (workspace / "undistorted0.mp4").exists()
+
+
+requires_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None, reason="ffmpeg is not installed"
+)
+
+
+@requires_ffmpeg
+def test_ffmpeg_writer(tmp_path):
+    save_path = tmp_path / "output.mp4"
+    writer = open_ffmpeg_writer(str(save_path), (64, 48), 30, "libx264")
+    for i in range(5):
+        writer.stdin.write(np.full((48, 64, 3), i * 40, dtype=np.uint8).data)
+    writer.stdin.close()
+    assert writer.wait() == 0
+    assert save_path.exists()
+    assert int(cv2.VideoCapture(str(save_path)).get(cv2.CAP_PROP_FRAME_COUNT)) == 5
+
+
+@requires_ffmpeg
+def test_undistort_and_rotate_writes_all_frames(workspace, caplog):
+    caplog.set_level(logging.INFO)
+    # Small read-ahead window (2 * chunksize * processes = 4) over 10 frames
+    result = CliRunner().invoke(
+        undistort_and_rotate,
+        ["-cam", "0", "-p", "2", "-cs", "1", "-r", "ROTATE_90_CLOCKWISE"],
+    )
+    assert result.exception is None
+    assert "successfully saved" in caplog.text
+    video = cv2.VideoCapture(str(workspace / "undistorted0.mp4"))
+    assert int(video.get(cv2.CAP_PROP_FRAME_COUNT)) == 10
+    assert (video.get(cv2.CAP_PROP_FRAME_WIDTH), video.get(cv2.CAP_PROP_FRAME_HEIGHT)) == (48, 64)
+
+
+@requires_ffmpeg
+def test_undistort_and_rotate_reports_ffmpeg_failure(workspace, caplog):
+    caplog.set_level(logging.INFO)
+    result = CliRunner().invoke(
+        undistort_and_rotate,
+        ["-cam", "0", "-p", "2", "--codec", "invalid_codec"],
+    )
+    assert result.exception is None
+    assert "ffmpeg failed with return code" in caplog.text
+    assert "successfully saved" not in caplog.text